@@ -1,206 +1,10 @@
 #Libraries
-import pandas as pd
-import folium
-import hashlib
 import streamlit as st
 from streamlit_folium import st_folium
-
-# Load the dataframe with caching
-@st.cache_data
-def load_data():
-    return pd.read_csv("df_updated.csv")
-
-df_updated = load_data()
-
-map_center = [44.6939, -69.3815]
-m = folium.Map(location=map_center, zoom_start=7)
-
-# Function to create and cache the base map
-@st.cache_data
-def create_base_map():
-    # Create base map with standard settings
-    return folium.Map(
-        location=map_center, 
-        zoom_start=7
-    )
-
-# Function to filter data based on criteria
-@st.cache_data
-def filter_data(selected_species, show_spring, show_fall, search_term, min_qty):
-    # Group data by water body, town, and county
-    grouped = df_updated.groupby(['WATER', 'TOWN', 'COUNTY'])
-    
-    filtered_groups = []
-    for (water_name, town_name, county_name), group in grouped:
-        # Check if the search term is in any of the fields (water, town, or county)
-        if (search_term.lower() in water_name.lower() or
-            search_term.lower() in town_name.lower() or
-            search_term.lower() in county_name.lower()):
-            
-            # Filter data by species and date (Spring/Fall)
-            filtered_rows = []
-            for _, row in group.iterrows():
-                # Handle empty DATE for non-stocked species (like pike)
-                date_str = str(row['DATE']).strip()
-                has_date = date_str != '' and date_str.lower() != 'nan'
-                
-                # Check season filter (only applies if date exists)
-                season_match = True
-                if has_date and (show_spring or show_fall):  # Only apply season filter if at least one is selected and date exists
-                    try:
-                        month = pd.to_datetime(row['DATE']).month
-                        season_match = (show_spring and month <= 6) or (show_fall and month >= 7)
-                    except:
-                        season_match = True  # If date parsing fails, show the record
-                
-                # Handle QTY and ABUNDANCE for different species types
-                qty_value = row['QTY']
-                abundance_value = ''
-                qty_display = 'N/A'
-                
-                # Check if this is Arctic Char with abundance data
-                is_arctic_char = False
-                if row['SPECIES'] == 'ARCTIC CHAR':
-                    # Check if ABUNDANCE column exists and has a value
-                    if 'ABUNDANCE' in df_updated.columns:
-                        try:
-                            abundance_str = str(row['ABUNDANCE']).strip()
-                            if pd.notna(row['ABUNDANCE']) and abundance_str != '' and abundance_str.lower() != 'nan':
-                                abundance_value = abundance_str
-                                is_arctic_char = True
-                                # Leave qty_value as 0 for Arctic Char - abundance is informational only
-                                qty_value = 0
-                                qty_display = 'N/A'
-                        except:
-                            pass  # If ABUNDANCE doesn't exist for this row, treat as regular
-                else:
-                    # Handle numeric QTY for stocked species
-                    if pd.isna(qty_value) or str(qty_value).strip() == '':
-                        qty_value = 0  # Default to 0 for empty quantities
-                    else:
-                        try:
-                            qty_value = float(qty_value)
-                            # Convert to integer for display (no half fish!)
-                            qty_display = int(qty_value) if qty_value > 0 else 'N/A'
-                        except:
-                            qty_value = 0
-                
-                # Check species and quantity filters
-                # For Arctic Char, always show regardless of min_qty (qty_value is 0)
-                # For other species, apply the min_qty filter
-                quantity_match = True
-                if not is_arctic_char:
-                    quantity_match = qty_value >= min_qty
-                
-                if (row['SPECIES'] in selected_species and 
-                    quantity_match and 
-                    season_match):
-                    # Format size as integer if it's a valid number
-                    size_display = 'N/A'
-                    if pd.notna(row['SIZE (inch)']) and str(row['SIZE (inch)']).strip() != '':
-                        try:
-                            size_value = float(row['SIZE (inch)'])
-                            size_display = int(size_value) if size_value > 0 else 'N/A'
-                        except:
-                            size_display = 'N/A'
-                    
-                    filtered_rows.append({
-                        'species': row['SPECIES'],
-                        'qty': qty_display,
-                        'abundance': abundance_value,  # Store abundance separately
-                        'size': size_display,
-                        'date': row['DATE'] if has_date else 'N/A (Not Stocked)'
-                    })
-            
-            # Only include groups that have filtered data
-            if filtered_rows:
-                filtered_groups.append({
-                    'water_name': water_name,
-                    'town_name': town_name,
-                    'county_name': county_name,
-                    'group': group,
-                    'filtered_rows': filtered_rows
-                })
-    
-    return filtered_groups
-
-# Function to determine marker color - all markers are green
-def get_marker_color(filtered_rows):
-    """
-    All markers are green.
-    """
-    return 'green'
-
-# Function to update the map based on selected species, date filters (Spring/Fall), and search
-def update_map(selected_species, show_spring, show_fall, search_term, min_qty):
-    # Get cached base map
-    m = create_base_map()
-    
-    # Get filtered data
-    filtered_groups = filter_data(selected_species, show_spring, show_fall, search_term, min_qty)
-    
-    # Add markers to the map
-    for group_data in filtered_groups:
-        water_name = group_data['water_name']
-        town_name = group_data['town_name']
-        county_name = group_data['county_name']
-        group = group_data['group']
-        filtered_rows = group_data['filtered_rows']
-        
-        # Create popup text
-        popup_text = f"""
-        <b>Water Body:</b> {water_name}<br>
-        <b>Town:</b> {town_name}<br>
-        <b>County:</b> {county_name}<br>
-        <b>Stocking Data:</b><br>
-        <ul>
-        """
-        for row in filtered_rows:
-            # Format the popup text based on species type
-            if row['species'] == 'ARCTIC CHAR' and row.get('abundance', ''):
-                # Show abundance for Arctic Char
-                popup_text += f"""
-            <li><b>{row['species']}</b> - Abundance: {row['abundance']} (native, not stocked)</li>
-            """
-            elif row['date'] == 'N/A (Not Stocked)':
-                # Show "Present" for other non-stocked species like pike
-                popup_text += f"""
-            <li><b>{row['species']}</b> - Present (not stocked)</li>
-            """
-            else:
-                # Show stocking details for stocked species
-                popup_text += f"""
-            <li><b>{row['species']}</b> - {row['qty']} fish, Size: {row['size']} inches, Date: {row['date']}</li>
-            """
-        popup_text += "</ul>"
-
-        # Use the average coordinates of the water body/town combination
-        avg_x = group['X_coord'].mean()
-        avg_y = group['Y_coord'].mean()
-
-        # Use deterministic offset based on water/town name to prevent flickering
-        # This ensures the same location always gets the same offset
-        location_hash = hashlib.md5(f"{water_name}_{town_name}".encode()).hexdigest()
-        # Convert hash to small deterministic offset (-0.001 to 0.001)
-        offset_x = (int(location_hash[:8], 16) / 0xFFFFFFFF) * 0.002 - 0.001
-        offset_y = (int(location_hash[8:16], 16) / 0xFFFFFFFF) * 0.002 - 0.001
-
-        # Determine marker color based on species present
-        marker_color = get_marker_color(filtered_rows)
-
-        # Add a single marker for the water body/town combo with grouped popup data
-        # Use escape=False to prevent HTML encoding issues that can cause rendering problems
-        folium.Marker(
-            location=[avg_y + offset_y, avg_x + offset_x],  # Apply deterministic offset to average coordinates
-            popup=folium.Popup(popup_text, max_width=300, min_width=200),
-            icon=folium.Icon(color=marker_color),  # Color-coded by species category
-            tooltip=f"{water_name}, {town_name}"  # Add tooltip for better UX
-        ).add_to(m)
-
-    return m
+from fishmap_core import load_species_list, update_map
 
 # List of unique species in your dataset (sorted for consistency)
-species_list = sorted(df_updated['SPECIES'].unique().tolist())
+species_list = load_species_list()
 
 # Streamlit Widgets
 st.title("Maine Coldwater Fishing")
@@ -224,7 +28,7 @@ with st.expander("ℹ️ How to Use This Map", expanded=False):
     - Town
     - County
 
-    Search results will update the map to show only matching locations.
+    Press **Update Map** (or Enter) to apply the search, and the map will update to show only matching locations.
 
     **📅 Stocking Filters (Stocked Species Only)**
 
@@ -285,11 +89,15 @@ show_fall = st.checkbox('Fall Stocking (Jul-Dec)', value=False)
 if not show_spring and not show_fall:
     st.info("💡 Select Spring or Fall to filter by season, or leave both unchecked to show all data.")
 
-# Create a search bar to filter by water body, town, or county
-search_term = st.text_input('Search by Water Body, Town, or County:', '')
+# Group the text inputs in a form so the map only rebuilds when the user submits
+with st.form('search_form'):
+    # Create a search bar to filter by water body, town, or county
+    search_term = st.text_input('Search by Water Body, Town, or County:', '')
+
+    # Create a text box for users to enter the minimum quantity of fish
+    min_qty_text = st.text_input('Enter Minimum Quantity of Fish:', '0')  # Default to 0 if not entered
 
-# Create a text box for users to enter the minimum quantity of fish
-min_qty_text = st.text_input('Enter Minimum Quantity of Fish:', '0')  # Default to 0 if not entered
+    st.form_submit_button('Update Map')
 
 # Convert min_qty_text to integer, ensuring it's valid
 try:
@@ -297,13 +105,19 @@ try:
 except ValueError:
     min_qty = 0  # If the input is not a number, default to 0
 
+# Normalize inputs so equivalent filters share a cache entry: the search is
+# case-insensitive, and quantities are never negative so any negative minimum
+# behaves like 0
+search_term = search_term.strip().lower()
+min_qty = max(min_qty, 0)
+
 # Generate and display the map with better caching
 @st.cache_data
 def get_cached_map(selected_species_tuple, show_spring, show_fall, search_term, min_qty):
     return update_map(list(selected_species_tuple), show_spring, show_fall, search_term, min_qty)
 
-# Convert to tuple for caching
-selected_species_tuple = tuple(selected_species)
+# Convert to a sorted tuple for caching (selection order doesn't change the map)
+selected_species_tuple = tuple(sorted(selected_species))
 
 # Get cached map with loading indicator and error handling
 try:
@@ -0,0 +1,236 @@
+"""
+Data loading, filtering and map building for the Maine fish map.
+FishMap.py is the Streamlit UI on top of these helpers.
+"""
+
+import copy
+import pandas as pd
+import numpy as np
+import folium
+from folium.plugins import MarkerCluster
+import hashlib
+import streamlit as st
+
+# Load the dataframe once per process; cache_resource shares the same object
+# across reruns and sessions instead of pickling a copy on every access
+@st.cache_resource
+def load_data():
+    # Parquet copy of df_updated.csv written by update_data_2025.py; it loads
+    # much faster than parsing the CSV
+    df = pd.read_parquet("df_updated.parquet")
+
+    # Location and species columns have few distinct values, so store them as
+    # categoricals to speed up groupby/isin
+    for col in ['WATER', 'TOWN', 'COUNTY', 'SPECIES']:
+        df[col] = df[col].astype('category')
+
+    # Precompute filter columns once so filter_data can work on whole columns
+    # instead of parsing dates and quantities row by row (month is stored as
+    # int8, with -1 for rows without a parseable date)
+    df['_MONTH'] = pd.to_datetime(df['DATE'], errors='coerce').dt.month.fillna(-1).astype('int8')
+    df['_QTY_NUM'] = pd.to_numeric(df['QTY'], errors='coerce').fillna(0)
+    df['_WATER_L'] = df['WATER'].str.lower()
+    df['_TOWN_L'] = df['TOWN'].str.lower()
+    df['_COUNTY_L'] = df['COUNTY'].str.lower()
+    return df
+
+df_updated = load_data()
+
+# Marker coordinates for each water body/town/county combination; these never
+# change with the filters, so compute them once rather than on every map update
+@st.cache_resource
+def load_coords_by_group():
+    coords = load_data().groupby(['WATER', 'TOWN', 'COUNTY'], observed=True)[['X_coord', 'Y_coord']].mean()
+
+    # Use deterministic offset based on water/town name to prevent flickering
+    # This ensures the same location always gets the same offset
+    # (md5 rather than hash(), since Python salts str hashes per process)
+    location_hashes = [
+        hashlib.md5(f"{water_name}_{town_name}".encode()).hexdigest()
+        for water_name, town_name, _ in coords.index
+    ]
+    hash_values = np.array(
+        [(int(h[:8], 16), int(h[8:16], 16)) for h in location_hashes], dtype=float
+    ).reshape(-1, 2)
+    # Convert hashes to small deterministic offsets (-0.001 to 0.001) in one pass
+    offsets = (hash_values / 0xFFFFFFFF) * 0.002 - 0.001
+    coords['X_coord'] += offsets[:, 0]
+    coords['Y_coord'] += offsets[:, 1]
+
+    return coords.to_dict('index')
+
+coords_by_group = load_coords_by_group()
+
+map_center = [44.6939, -69.3815]
+
+# Build the base map once per process; cache_resource skips the pickle
+# round-trip cache_data does for the nested folium objects
+@st.cache_resource
+def load_base_map():
+    # Create base map with standard settings
+    return folium.Map(
+        location=map_center, 
+        zoom_start=7
+    )
+
+# Function to get a fresh copy of the cached base map (update_map adds markers
+# to it, so the shared instance must not be modified)
+def create_base_map():
+    return copy.deepcopy(load_base_map())
+
+# Function to filter data based on criteria
+@st.cache_data
+def filter_data(selected_species, show_spring, show_fall, search_term, min_qty):
+    # Nothing can match if every species was deselected
+    if not selected_species:
+        return []
+
+    df = df_updated
+
+    # Filter by species, comparing integer category codes rather than strings
+    # (get_indexer gives -1 for unknown species, which is also the NaN code)
+    species_codes = df['SPECIES'].cat.categories.get_indexer(selected_species)
+    species_codes = species_codes[species_codes >= 0]
+    mask = pd.Series(np.isin(df['SPECIES'].cat.codes.to_numpy(), species_codes), index=df.index)
+
+    # Check if the search term is in any of the fields (water, town, or county);
+    # an empty search matches everything, so skip the substring scans entirely
+    if search_term:
+        search = search_term.lower()
+        mask &= (df['_WATER_L'].str.contains(search, regex=False, na=False) |
+                 df['_TOWN_L'].str.contains(search, regex=False, na=False) |
+                 df['_COUNTY_L'].str.contains(search, regex=False, na=False))
+
+        # Skip the remaining filters if the search didn't match anything
+        if not mask.any():
+            return []
+
+    # Season filter only applies to rows with a parseable date, and only if
+    # at least one season is selected
+    if show_spring or show_fall:
+        month = df['_MONTH']
+        mask &= (show_spring & (month <= 6)) | (show_fall & (month >= 7)) | (month == -1)
+
+    # Arctic Char with abundance data is always shown regardless of min_qty;
+    # every other species must meet the minimum quantity
+    if 'ABUNDANCE' in df.columns:
+        abundance = df['ABUNDANCE'].astype(str).str.strip()
+        has_abundance = df['ABUNDANCE'].notna() & (abundance != '') & (abundance.str.lower() != 'nan')
+    else:
+        abundance = pd.Series('', index=df.index)
+        has_abundance = pd.Series(False, index=df.index)
+    is_arctic_char = (df['SPECIES'] == 'ARCTIC CHAR') & has_abundance
+    mask &= (df['_QTY_NUM'] >= min_qty) | is_arctic_char
+
+    filtered = df[mask]
+    species = filtered['SPECIES'].astype(str)
+    arctic_char = is_arctic_char[mask]
+
+    # Handle empty DATE for non-stocked species (like pike)
+    date = filtered['DATE'].astype(str)
+    has_date = filtered['DATE'].notna() & (date.str.strip() != '')
+
+    # Leave quantity as N/A for Arctic Char - abundance is informational only
+    # Convert to integer for display (no half fish!)
+    qty = filtered['_QTY_NUM']
+    qty_display = qty.astype(int).astype(str).where(~arctic_char & (qty > 0), 'N/A')
+
+    # Format size as integer if it's a valid number
+    size = pd.to_numeric(filtered['SIZE (inch)'], errors='coerce').fillna(0)
+    size_display = size.astype(int).astype(str).where(size > 0, 'N/A')
+
+    # Format the popup list item for every row at once based on species type
+    popup_items = np.select(
+        [arctic_char, ~has_date],
+        [
+            # Show abundance for Arctic Char
+            """
+            <li><b>""" + species + "</b> - Abundance: " + abundance[mask] + """ (native, not stocked)</li>
+            """,
+            # Show "Present" for other non-stocked species like pike
+            """
+            <li><b>""" + species + """</b> - Present (not stocked)</li>
+            """,
+        ],
+        # Show stocking details for stocked species
+        """
+            <li><b>""" + species + "</b> - " + qty_display + " fish, Size: " + size_display + " inches, Date: " + date + """</li>
+            """
+    )
+    popup_items = pd.Series(popup_items, index=filtered.index)
+
+    filtered_groups = []
+    for (water_name, town_name, county_name), items in popup_items.groupby(
+            [filtered['WATER'], filtered['TOWN'], filtered['COUNTY']], observed=True, sort=False):
+        filtered_groups.append({
+            'water_name': water_name,
+            'town_name': town_name,
+            'county_name': county_name,
+            'popup_items': tuple(items)
+        })
+
+    return filtered_groups
+
+# Function to determine marker color - all markers are green
+def get_marker_color(popup_items):
+    """
+    All markers are green.
+    """
+    return 'green'
+
+# Function to build the popup HTML for one location
+def render_popup(water_name, town_name, county_name, popup_items):
+    """
+    popup_items is the tuple of pre-rendered <li> items produced by
+    filter_data, so this is just a single string join.
+    """
+    return f"""
+        <b>Water Body:</b> {water_name}<br>
+        <b>Town:</b> {town_name}<br>
+        <b>County:</b> {county_name}<br>
+        <b>Stocking Data:</b><br>
+        <ul>
+        """ + "".join(popup_items) + "</ul>"
+
+# Function to update the map based on selected species, date filters (Spring/Fall), and search
+def update_map(selected_species, show_spring, show_fall, search_term, min_qty):
+    # Get cached base map
+    m = create_base_map()
+    
+    # Get filtered data
+    filtered_groups = filter_data(selected_species, show_spring, show_fall, search_term, min_qty)
+    
+    # Cluster markers so nearby locations collapse into one marker at low zoom
+    cluster = MarkerCluster().add_to(m)
+    
+    # Add markers to the map
+    for group_data in filtered_groups:
+        water_name = group_data['water_name']
+        town_name = group_data['town_name']
+        county_name = group_data['county_name']
+        popup_items = group_data['popup_items']
+        
+        # Create popup text
+        popup_text = render_popup(water_name, town_name, county_name, popup_items)
+
+        # Average coordinates of the water body/town combination, with its offset applied
+        coords = coords_by_group[(water_name, town_name, county_name)]
+
+        # Determine marker color based on species present
+        marker_color = get_marker_color(popup_items)
+
+        # Add a single marker for the water body/town combo with grouped popup data
+        # Use escape=False to prevent HTML encoding issues that can cause rendering problems
+        folium.Marker(
+            location=[coords['Y_coord'], coords['X_coord']],  # Offset coordinates from coords_by_group
+            popup=folium.Popup(popup_text, max_width=300, min_width=200, lazy=True),  # Only build popup HTML when opened
+            icon=folium.Icon(color=marker_color),  # Color-coded by species category
+            tooltip=f"{water_name}, {town_name}"  # Add tooltip for better UX
+        ).add_to(cluster)
+
+    return m
+
+# List of unique species in your dataset (sorted for consistency)
+@st.cache_resource
+def load_species_list():
+    return sorted(load_data()['SPECIES'].unique().tolist())
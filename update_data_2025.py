@@ -3,7 +3,7 @@ Script to update fish stocking data with 2025 data.
 - Loads 2025 stocking data
 - Merges coordinates from existing data and manually added coordinates
 - Combines with permanent species data (pike and char)
-- Updates df_updated.csv
+- Updates df_updated.csv and df_updated.parquet (read by the app)
 - Creates coordinate_reference.csv for future use
 """
 
@@ -72,16 +72,20 @@ def load_2025_data(xlsx_path='2025_Stocking.xlsx'):
     
     return df_clean
 
+def build_coord_lookup(df):
+    """Build a (WATER, TOWN) -> (X_coord, Y_coord) lookup from rows with coordinates."""
+    df = df[df['X_coord'].notna() & df['Y_coord'].notna()]
+    keys = zip(df['WATER'].astype(str).str.strip().str.upper(),
+               df['TOWN'].astype(str).str.strip().str.upper())
+    values = zip(df['X_coord'].astype(float), df['Y_coord'].astype(float))
+    return dict(zip(keys, values))
+
 def load_existing_coordinates(df_current_path='df_updated.csv'):
     """Load coordinate lookup from existing data."""
     print(f"\nLoading existing coordinates from: {df_current_path}")
     df_current = pd.read_csv(df_current_path)
     
-    coord_lookup = {}
-    for _, row in df_current.iterrows():
-        if pd.notna(row['X_coord']) and pd.notna(row['Y_coord']):
-            key = (str(row['WATER']).strip().upper(), str(row['TOWN']).strip().upper())
-            coord_lookup[key] = (float(row['X_coord']), float(row['Y_coord']))
+    coord_lookup = build_coord_lookup(df_current)
     
     print(f"  Found coordinates for {len(coord_lookup)} unique waterbody/town combinations")
     return coord_lookup
@@ -91,11 +95,7 @@ def load_manual_coordinates(csv_path='missing_coordinates_2025.csv'):
     print(f"\nLoading manual coordinates from: {csv_path}")
     df_manual = pd.read_csv(csv_path)
     
-    manual_coords = {}
-    for _, row in df_manual.iterrows():
-        if pd.notna(row['X_coord']) and pd.notna(row['Y_coord']):
-            key = (str(row['WATER']).strip().upper(), str(row['TOWN']).strip().upper())
-            manual_coords[key] = (float(row['X_coord']), float(row['Y_coord']))
+    manual_coords = build_coord_lookup(df_manual)
     
     print(f"  Found {len(manual_coords)} manually added coordinates")
     return manual_coords
@@ -103,19 +103,17 @@ def load_manual_coordinates(csv_path='missing_coordinates_2025.csv'):
 def merge_coordinates(df, existing_coords, manual_coords):
     """Merge coordinates into dataframe."""
     print("\nMerging coordinates...")
-    df['X_coord'] = None
-    df['Y_coord'] = None
-    
-    for idx, row in df.iterrows():
-        key = (str(row['WATER']).strip().upper(), str(row['TOWN']).strip().upper())
-        
-        # Prioritize manual coordinates, then existing
-        if key in manual_coords:
-            df.at[idx, 'X_coord'] = manual_coords[key][0]
-            df.at[idx, 'Y_coord'] = manual_coords[key][1]
-        elif key in existing_coords:
-            df.at[idx, 'X_coord'] = existing_coords[key][0]
-            df.at[idx, 'Y_coord'] = existing_coords[key][1]
+    keys = pd.Series(
+        list(zip(df['WATER'].astype(str).str.strip().str.upper(),
+                 df['TOWN'].astype(str).str.strip().str.upper())),
+        index=df.index
+    )
+    
+    # Prioritize manual coordinates, then existing
+    for i, col in enumerate(['X_coord', 'Y_coord']):
+        manual = {key: coords[i] for key, coords in manual_coords.items()}
+        existing = {key: coords[i] for key, coords in existing_coords.items()}
+        df[col] = keys.map(manual).fillna(keys.map(existing))
     
     # Count coordinates
     has_coords = df['X_coord'].notna() & df['Y_coord'].notna()
@@ -183,6 +181,14 @@ def create_coordinate_reference(df):
     
     return coord_ref
 
+def save_parquet(csv_path='df_updated.csv', parquet_path='df_updated.parquet'):
+    """Write a Parquet copy of the saved CSV for fast loading in the app."""
+    # Re-read the CSV so both files hold exactly the same values and types
+    # (the combined data mixes Excel dates with strings from the old CSV)
+    df = pd.read_csv(csv_path)
+    df.to_parquet(parquet_path, index=False, compression='zstd')
+    return df
+
 def main():
     """Main function to update data."""
     print("=" * 80)
@@ -218,6 +224,11 @@ def main():
     df_updated.to_csv(output_csv, index=False)
     print(f"  ✅ Saved {len(df_updated)} rows")
     
+    output_parquet = 'df_updated.parquet'
+    print(f"\nSaving Parquet copy to: {output_parquet}")
+    save_parquet(output_csv, output_parquet)
+    print(f"  ✅ Saved {len(df_updated)} rows")
+    
     coord_ref_csv = 'coordinate_reference.csv'
     print(f"\nSaving coordinate reference to: {coord_ref_csv}")
     coord_reference.to_csv(coord_ref_csv, index=False)